@@ -2,14 +2,15 @@
 REST API 路由
 """
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import Response
-from pydantic import BaseModel
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
-import json
-from datetime import datetime
+import time
+from functools import lru_cache
+import orjson
 
 from .preset_validator import PresetValidator
-from .bypass_config import ConfigValidationError
+from .bypass_config import BypassConfig, ConfigValidationError
 
 # 将在 main.py 中注入
 queue_manager = None
@@ -17,20 +18,27 @@ websocket_broadcast = None
 bypass_config_manager = None
 bypass_handler = None
 
+IMPORT_MAX_BYTES = 10 * 1024 * 1024  # 10MB
+IMPORT_CHUNK_SIZE = 64 * 1024
+
 router = APIRouter(prefix="/api/preset-queue", tags=["preset-queue"])
 
 
 class AddResponseRequest(BaseModel):
+    model_config = ConfigDict(extra='ignore', validate_assignment=False)
+
     response: dict
     status_code: int = 200
 
 
 class BatchAddRequest(BaseModel):
+    model_config = ConfigDict(extra='ignore', validate_assignment=False)
+
     responses: List[dict]
     status_code: int = 200
 
 
-@router.get("")
+@router.get("", response_model=None)
 async def get_all_queues():
     """获取所有IP队列信息"""
     queues = await queue_manager.get_all_queues()
@@ -45,7 +53,40 @@ async def get_all_queues():
     }
 
 
-@router.get("/{ip}")
+async def _stream_all_queues(all_queues: dict):
+    """逐个IP增量编码导出内容，避免一次性构建完整JSON"""
+    yield b'{'
+    first = True
+    for ip, queue in all_queues.items():
+        prefix = b'' if first else b','
+        yield prefix + orjson.dumps(ip) + b':' + orjson.dumps(
+            [item["response"] for item in queue], option=orjson.OPT_NON_STR_KEYS
+        )
+        first = False
+    yield b'}'
+
+
+@router.get("/export", response_model=None)
+async def export_all_queues():
+    """导出所有队列为JSON文件"""
+    all_queues = await queue_manager.get_all_queues()
+
+    if not all_queues:
+        raise HTTPException(status_code=404, detail="没有可导出的队列")
+
+    timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime())
+    filename = f"queue_all_{timestamp}.json"
+
+    return StreamingResponse(
+        _stream_all_queues(all_queues),
+        media_type="application/json",
+        headers={
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
+    )
+
+
+@router.get("/{ip}", response_model=None)
 async def get_queue(ip: str):
     """获取指定IP的队列"""
     queue = await queue_manager.get_queue(ip)
@@ -56,7 +97,7 @@ async def get_queue(ip: str):
     }
 
 
-@router.post("/{ip}")
+@router.post("/{ip}", response_model=None)
 async def add_response(ip: str, req: AddResponseRequest):
     """添加单个响应到指定IP队列"""
     # 验证响应JSON
@@ -79,18 +120,17 @@ async def add_response(ip: str, req: AddResponseRequest):
     }
 
 
-@router.post("/{ip}/batch")
+@router.post("/{ip}/batch", response_model=None)
 async def batch_add_responses(ip: str, req: BatchAddRequest):
     """批量添加响应到指定IP队列"""
     errors = PresetValidator.validate_array_elements(req.responses)
+    bad_indices = {idx for idx, _ in errors}
 
-    added = []
-    for idx, response in enumerate(req.responses):
-        if not any(e[0] == idx for e in errors):
-            response_id = await queue_manager.add_response(
-                ip, response, req.status_code
-            )
-            added.append(response_id)
+    added = await queue_manager.add_responses_bulk(
+        ip,
+        [r for idx, r in enumerate(req.responses) if idx not in bad_indices],
+        req.status_code
+    )
 
     # 广播更新
     if websocket_broadcast:
@@ -105,33 +145,35 @@ async def batch_add_responses(ip: str, req: BatchAddRequest):
     }
 
 
-@router.post("/{ip}/import")
+@router.post("/{ip}/import", response_model=None)
 async def import_queue(ip: str, file: UploadFile = File(...)):
     """从JSON文件导入队列"""
-    # 检查文件大小
-    content = await file.read()
-    if len(content) > 10 * 1024 * 1024:  # 10MB
-        raise HTTPException(status_code=400, detail="文件大小超过10MB限制")
-
-    try:
-        content_str = content.decode('utf-8')
-    except UnicodeDecodeError:
-        raise HTTPException(status_code=400, detail="文件编码错误，请使用UTF-8编码")
-
-    # 验证JSON数组
-    is_valid, parsed_array, error = PresetValidator.validate_import_array(content_str)
+    # 分块读取，超过大小限制立即拒绝
+    buf = bytearray()
+    while chunk := await file.read(IMPORT_CHUNK_SIZE):
+        buf.extend(chunk)
+        if len(buf) > IMPORT_MAX_BYTES:
+            raise HTTPException(status_code=400, detail="文件大小超过10MB限制")
+    content = bytes(buf)
+
+    # 验证JSON数组（直接解析字节）
+    is_valid, parsed_array, error = PresetValidator.validate_import_bytes(content)
     if not is_valid:
+        # 仅在失败时区分编码错误
+        try:
+            content.decode('utf-8')
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="文件编码错误，请使用UTF-8编码")
         raise HTTPException(status_code=400, detail=error)
 
     # 验证数组元素
     element_errors = PresetValidator.validate_array_elements(parsed_array)
+    bad_indices = {idx for idx, _ in element_errors}
 
     # 添加有效元素
-    added = []
-    for idx, response in enumerate(parsed_array):
-        if not any(e[0] == idx for e in element_errors):
-            response_id = await queue_manager.add_response(ip, response)
-            added.append(response_id)
+    added = await queue_manager.add_responses_bulk(
+        ip, [r for idx, r in enumerate(parsed_array) if idx not in bad_indices]
+    )
 
     # 广播更新
     if websocket_broadcast:
@@ -146,7 +188,7 @@ async def import_queue(ip: str, file: UploadFile = File(...)):
     }
 
 
-@router.get("/{ip}/export")
+@router.get("/{ip}/export", response_model=None)
 async def export_queue(ip: str):
     """导出指定IP队列为JSON文件"""
     queue = await queue_manager.get_queue(ip)
@@ -157,35 +199,11 @@ async def export_queue(ip: str):
     # 提取响应体
     responses = [item["response"] for item in queue]
 
-    json_content = json.dumps(responses, ensure_ascii=False, indent=2)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"queue_{ip}_{timestamp}.json"
-
-    return Response(
-        content=json_content,
-        media_type="application/json",
-        headers={
-            "Content-Disposition": f"attachment; filename={filename}"
-        }
+    json_content = orjson.dumps(
+        responses, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
     )
-
-
-@router.get("/export")
-async def export_all_queues():
-    """导出所有队列为JSON文件"""
-    all_queues = await queue_manager.get_all_queues()
-
-    if not all_queues:
-        raise HTTPException(status_code=404, detail="没有可导出的队列")
-
-    # 构建导出格式
-    export_data = {}
-    for ip, queue in all_queues.items():
-        export_data[ip] = [item["response"] for item in queue]
-
-    json_content = json.dumps(export_data, ensure_ascii=False, indent=2)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"queue_all_{timestamp}.json"
+    timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime())
+    filename = f"queue_{ip}_{timestamp}.json"
 
     return Response(
         content=json_content,
@@ -196,7 +214,7 @@ async def export_all_queues():
     )
 
 
-@router.delete("/{ip}/{response_id}")
+@router.delete("/{ip}/{response_id}", response_model=None)
 async def delete_response(ip: str, response_id: str):
     """删除指定响应"""
     success = await queue_manager.delete_response(ip, response_id)
@@ -210,7 +228,7 @@ async def delete_response(ip: str, response_id: str):
     return {"success": True}
 
 
-@router.delete("/{ip}")
+@router.delete("/{ip}", response_model=None)
 async def clear_queue(ip: str):
     """清空指定IP的队列"""
     success = await queue_manager.clear_queue(ip)
@@ -224,7 +242,7 @@ async def clear_queue(ip: str):
     return {"success": True}
 
 
-@router.delete("")
+@router.delete("", response_model=None)
 async def clear_all_queues():
     """清空所有队列"""
     await queue_manager.clear_all_queues()
@@ -242,6 +260,8 @@ bypass_router = APIRouter(prefix="/api/bypass", tags=["bypass"])
 
 
 class BypassConfigUpdateRequest(BaseModel):
+    model_config = ConfigDict(extra='ignore', validate_assignment=False)
+
     target_host: Optional[str] = None
     target_port: Optional[int] = None
     target_uri: Optional[str] = None
@@ -250,10 +270,9 @@ class BypassConfigUpdateRequest(BaseModel):
     timeout: Optional[int] = None
 
 
-@bypass_router.get("/config")
-async def get_bypass_config():
-    """获取 bypass 配置"""
-    config = await bypass_config_manager.get_config()
+@lru_cache(maxsize=4)
+def _config_to_public_dict(config: BypassConfig) -> dict:
+    """将配置快照转换为对外展示的字典（按快照缓存，隐藏 api_key）"""
     return {
         "enabled": config.enabled,
         "target_host": config.target_host,
@@ -265,13 +284,20 @@ async def get_bypass_config():
     }
 
 
-@bypass_router.put("/config")
+@bypass_router.get("/config", response_model=None)
+async def get_bypass_config():
+    """获取 bypass 配置"""
+    config = await bypass_config_manager.get_config()
+    return _config_to_public_dict(config)
+
+
+@bypass_router.put("/config", response_model=None)
 async def update_bypass_config(req: BypassConfigUpdateRequest):
     """更新 bypass 配置"""
     try:
-        # 只传递非 None 的字段
+        # 只传递请求中显式设置且非 None 的字段
         update_data = {
-            k: v for k, v in req.dict().items()
+            k: v for k, v in req.model_dump(exclude_unset=True).items()
             if v is not None
         }
 
@@ -281,20 +307,12 @@ async def update_bypass_config(req: BypassConfigUpdateRequest):
         if websocket_broadcast:
             await websocket_broadcast("bypass_config_updated")
 
-        return {
-            "enabled": config.enabled,
-            "target_host": config.target_host,
-            "target_port": config.target_port,
-            "target_uri": config.target_uri,
-            "use_https": config.use_https,
-            "timeout": config.timeout,
-            "api_key_configured": bool(config.api_key)
-        }
+        return _config_to_public_dict(config)
     except ConfigValidationError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@bypass_router.post("/enable")
+@bypass_router.post("/enable", response_model=None)
 async def enable_bypass():
     """启用 bypass 模式"""
     try:
@@ -309,7 +327,7 @@ async def enable_bypass():
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@bypass_router.post("/disable")
+@bypass_router.post("/disable", response_model=None)
 async def disable_bypass():
     """禁用 bypass 模式"""
     await bypass_config_manager.disable()
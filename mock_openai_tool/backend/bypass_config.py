@@ -5,16 +5,26 @@ import json
 import logging
 import os
 import re
-from dataclasses import dataclass, asdict
+import time
+from dataclasses import dataclass, asdict, replace
 from pathlib import Path
 from typing import Optional
 
+import aiofiles
+import orjson
+
 logger = logging.getLogger("bypass")
 
+# Allowed target_host characters: domain names and IP addresses
+_HOST_RE = re.compile(r'\A[\w.\-]+\Z')
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BypassConfig:
-    """Bypass configuration data class."""
+    """Bypass configuration data class.
+
+    Instances are immutable snapshots; updates build a new instance.
+    """
     enabled: bool = False
     target_host: str = "api.openai.com"
     target_port: int = 443
@@ -56,16 +66,18 @@ class BypassConfigManager:
             self._config = BypassConfig(**data)
             logger.info("Loaded bypass config from file")
         except Exception as e:
-            logger.error(f"Failed to load config: {e}", exc_info=True)
+            logger.error("Failed to load config: %s", e, exc_info=True)
 
     async def get_config(self) -> BypassConfig:
         """Get current configuration.
 
+        Lock-free: writers publish a new frozen snapshot with a single
+        attribute assignment, so readers always see a complete config.
+
         Returns:
-            Current BypassConfig instance
+            Current (immutable) BypassConfig snapshot
         """
-        async with self._lock:
-            return BypassConfig(**asdict(self._config))
+        return self._config
 
     async def update_config(self, **kwargs) -> BypassConfig:
         """Update configuration (partial or full).
@@ -81,11 +93,11 @@ class BypassConfigManager:
         """
         async with self._lock:
             # Create updated config
-            config_dict = asdict(self._config)
-            config_dict.update(kwargs)
-            config_dict['updated_at'] = asyncio.get_event_loop().time()
-
-            new_config = BypassConfig(**config_dict)
+            new_config = replace(
+                self._config,
+                **kwargs,
+                updated_at=time.monotonic(),
+            )
 
             # Validate
             self._validate_config(new_config)
@@ -94,8 +106,8 @@ class BypassConfigManager:
             self._config = new_config
             await self._persist()
 
-            logger.info(f"Config updated: {kwargs.keys()}")
-            return BypassConfig(**asdict(self._config))
+            logger.info("Config updated: %s", kwargs.keys())
+            return self._config
 
     async def enable(self) -> bool:
         """Enable bypass mode.
@@ -113,13 +125,16 @@ class BypassConfigManager:
             if not self._config.target_port:
                 raise ConfigValidationError("target_port is required")
 
-            self._config.enabled = True
-            self._config.updated_at = asyncio.get_event_loop().time()
+            self._config = replace(
+                self._config,
+                enabled=True,
+                updated_at=time.monotonic(),
+            )
             await self._persist()
 
             logger.info(
-                f"Bypass enabled: {self._config.target_host}:"
-                f"{self._config.target_port}"
+                "Bypass enabled: %s:%d",
+                self._config.target_host, self._config.target_port
             )
             return True
 
@@ -130,8 +145,11 @@ class BypassConfigManager:
             True if disabled successfully
         """
         async with self._lock:
-            self._config.enabled = False
-            self._config.updated_at = asyncio.get_event_loop().time()
+            self._config = replace(
+                self._config,
+                enabled=False,
+                updated_at=time.monotonic(),
+            )
             await self._persist()
 
             logger.info("Bypass disabled")
@@ -143,8 +161,18 @@ class BypassConfigManager:
         Returns:
             True if enabled
         """
-        async with self._lock:
-            return self._config.enabled
+        return self._config.enabled
+
+    def enabled_fast(self) -> bool:
+        """Synchronously check if bypass mode is enabled.
+
+        Reads the current immutable snapshot without awaiting, for use on
+        the per-request hot path.
+
+        Returns:
+            True if enabled
+        """
+        return self._config.enabled
 
     def _validate_config(self, config: BypassConfig) -> None:
         """Validate configuration.
@@ -160,7 +188,7 @@ class BypassConfigManager:
             raise ConfigValidationError("target_host cannot be empty")
 
         # Simple validation: allow domain names and IP addresses
-        if not re.match(r'^[\w\.\-]+$', config.target_host):
+        if not _HOST_RE.match(config.target_host):
             raise ConfigValidationError(
                 f"Invalid target_host format: {config.target_host}"
             )
@@ -184,11 +212,17 @@ class BypassConfigManager:
             )
 
     async def _persist(self) -> None:
-        """Persist configuration to file."""
+        """Persist configuration to file.
+
+        Writes to a temporary sibling file without blocking the event loop,
+        then atomically renames it over the config file.
+        """
+        tmp_file = self._config_file.with_name(self._config_file.name + '.tmp')
         try:
-            data = asdict(self._config)
-            with open(self._config_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            data = orjson.dumps(asdict(self._config), option=orjson.OPT_INDENT_2)
+            async with aiofiles.open(tmp_file, 'wb') as f:
+                await f.write(data)
+            os.replace(tmp_file, self._config_file)
             logger.debug("Config persisted to file")
         except Exception as e:
-            logger.error(f"Failed to persist config: {e}", exc_info=True)
+            logger.error("Failed to persist config: %s", e, exc_info=True)
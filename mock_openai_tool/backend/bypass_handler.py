@@ -2,9 +2,10 @@
 
 import logging
 import time
-from typing import Tuple, Optional
+from typing import AsyncIterator, Mapping, Tuple, Optional
 
 import httpx
+import orjson
 
 from mock_openai_tool.backend.bypass_config import (
     BypassConfig,
@@ -14,7 +15,7 @@ from mock_openai_tool.backend.bypass_config import (
 logger = logging.getLogger("bypass")
 
 # Headers to filter out (hop-by-hop headers)
-HOP_BY_HOP_HEADERS = {
+HOP_BY_HOP_HEADERS = frozenset({
     'connection',
     'keep-alive',
     'proxy-authenticate',
@@ -25,7 +26,37 @@ HOP_BY_HOP_HEADERS = {
     'upgrade',
     'host',  # Will be set to target host
     'content-length',  # Will be auto-calculated by httpx
-}
+})
+
+# Connection pool shared by all forwarded requests
+CLIENT_LIMITS = httpx.Limits(max_keepalive_connections=100, max_connections=200)
+
+# Content types assumed when the upstream response does not declare one
+DEFAULT_CONTENT_TYPE = 'application/json'
+STREAM_CONTENT_TYPE = 'text/event-stream'
+
+
+def decode_response_body(body: bytes, status_code: int) -> dict:
+    """Decode a forwarded response body for display.
+
+    Args:
+        body: Raw response body
+        status_code: Upstream HTTP status code
+
+    Returns:
+        Parsed JSON body, or an OpenAI-style error object wrapping the
+        text if the body is not JSON
+    """
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return {
+            "error": {
+                "message": body.decode('utf-8', errors='replace'),
+                "type": "api_error",
+                "code": status_code,
+            }
+        }
 
 
 class BypassError(Exception):
@@ -48,35 +79,43 @@ class BypassHandler:
         """
         self._config_manager = config_manager
         self._client: Optional[httpx.AsyncClient] = None
+        # (config snapshot, target URL, Authorization header) cache
+        self._cached: Tuple[Optional[BypassConfig], str, Optional[str]] = (
+            None, "", None
+        )
 
     async def forward_request(
         self,
         request_body: dict,
-        original_headers: dict,
+        original_headers: Mapping[str, str],
         client_ip: str
-    ) -> Tuple[dict, int, float]:
+    ) -> Tuple[bytes, int, str, float]:
         """Forward request to real OpenAI API.
 
+        The upstream body is returned untouched so it can be passed through
+        to the client without a parse/re-serialize round trip; use
+        decode_response_body() when a dict is needed.
+
         Args:
             request_body: Request body to forward
             original_headers: Original request headers
             client_ip: Client IP address (for logging)
 
         Returns:
-            Tuple of (response_body, status_code, elapsed_time)
+            Tuple of (response_body, status_code, content_type, elapsed_time)
 
         Raises:
             BypassError: If forwarding fails
         """
         config = await self._config_manager.get_config()
-        target_url = self._build_url(config)
+        target_url, _ = self._resolve_target(config)
         headers = self._prepare_headers(original_headers, config)
 
         logger.info(
-            f"Forwarding request from {client_ip} to {target_url}"
+            "Forwarding request from %s to %s", client_ip, target_url
         )
 
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         try:
             client = await self._get_client(config)
@@ -87,60 +126,140 @@ class BypassHandler:
                 timeout=config.timeout,
             )
 
-            elapsed = time.time() - start_time
-
-            # Try to parse JSON response
-            try:
-                response_body = response.json()
-            except Exception:
-                # If not JSON, wrap in error format
-                response_body = {
-                    "error": {
-                        "message": response.text,
-                        "type": "api_error",
-                        "code": response.status_code,
-                    }
-                }
+            elapsed = time.perf_counter() - start_time
+            content_type = response.headers.get(
+                'content-type', DEFAULT_CONTENT_TYPE
+            )
 
             logger.info(
-                f"Received response: status={response.status_code}, "
-                f"elapsed={elapsed:.3f}s"
+                "Received response: status=%d, elapsed=%.3fs",
+                response.status_code, elapsed
             )
 
-            return response_body, response.status_code, elapsed
+            return response.content, response.status_code, content_type, elapsed
 
-        except httpx.TimeoutException as e:
-            elapsed = time.time() - start_time
-            logger.error(f"Request timeout after {elapsed:.3f}s", exc_info=True)
-            raise BypassError(
-                f"Request timeout after {config.timeout}s",
-                cause=e
+        except Exception as e:
+            raise self._to_bypass_error(e, config, target_url, start_time)
+
+    async def forward_stream_request(
+        self,
+        request_body: dict,
+        original_headers: Mapping[str, str],
+        client_ip: str
+    ) -> Tuple[AsyncIterator[bytes], int, str]:
+        """Forward a streaming (``stream: true``) request to real OpenAI API.
+
+        Returns as soon as the upstream response headers arrive; the body is
+        relayed chunk by chunk instead of being buffered in memory.
+
+        Args:
+            request_body: Request body to forward
+            original_headers: Original request headers
+            client_ip: Client IP address (for logging)
+
+        Returns:
+            Tuple of (body_chunks, status_code, content_type). The upstream
+            response is closed once body_chunks is exhausted or closed.
+
+        Raises:
+            BypassError: If the upstream request cannot be started
+        """
+        config = await self._config_manager.get_config()
+        target_url, _ = self._resolve_target(config)
+        headers = self._prepare_headers(original_headers, config)
+
+        logger.info(
+            "Forwarding streaming request from %s to %s", client_ip, target_url
+        )
+
+        start_time = time.perf_counter()
+
+        try:
+            client = await self._get_client(config)
+            request = client.build_request(
+                "POST",
+                target_url,
+                json=request_body,
+                headers=headers,
+                timeout=config.timeout,
             )
+            response = await client.send(request, stream=True)
+        except Exception as e:
+            raise self._to_bypass_error(e, config, target_url, start_time)
+
+        content_type = response.headers.get(
+            'content-type', STREAM_CONTENT_TYPE
+        )
+
+        async def body_chunks() -> AsyncIterator[bytes]:
+            try:
+                async for chunk in response.aiter_bytes():
+                    yield chunk
+            except httpx.HTTPError as e:
+                logger.error("Stream interrupted: %s", e, exc_info=True)
+            finally:
+                await response.aclose()
+
+        return body_chunks(), response.status_code, content_type
 
-        except httpx.ConnectError as e:
-            elapsed = time.time() - start_time
-            logger.error(f"Connection failed: {e}", exc_info=True)
-            raise BypassError(
-                f"Failed to connect to {target_url}: {str(e)}",
-                cause=e
+    def _to_bypass_error(
+        self,
+        error: Exception,
+        config: BypassConfig,
+        target_url: str,
+        start_time: float
+    ) -> BypassError:
+        """Log a forwarding failure and wrap it in a BypassError.
+
+        Args:
+            error: Original exception
+            config: Bypass configuration used for the request
+            target_url: Target URL of the request
+            start_time: perf_counter() value when the request was started
+
+        Returns:
+            BypassError describing the failure
+        """
+        if isinstance(error, httpx.TimeoutException):
+            logger.error(
+                "Request timeout after %.3fs",
+                time.perf_counter() - start_time, exc_info=True
+            )
+            return BypassError(
+                f"Request timeout after {config.timeout}s",
+                cause=error
             )
 
-        except httpx.HTTPError as e:
-            elapsed = time.time() - start_time
-            logger.error(f"HTTP error: {e}", exc_info=True)
-            raise BypassError(
-                f"HTTP error: {str(e)}",
-                cause=e
+        if isinstance(error, httpx.ConnectError):
+            logger.error("Connection failed: %s", error, exc_info=True)
+            return BypassError(
+                f"Failed to connect to {target_url}: {str(error)}",
+                cause=error
             )
 
-        except Exception as e:
-            elapsed = time.time() - start_time
-            logger.error(f"Unexpected error: {e}", exc_info=True)
-            raise BypassError(
-                f"Unexpected error: {str(e)}",
-                cause=e
+        if isinstance(error, httpx.HTTPError):
+            logger.error("HTTP error: %s", error, exc_info=True)
+            return BypassError(
+                f"HTTP error: {str(error)}",
+                cause=error
             )
 
+        logger.error("Unexpected error: %s", error, exc_info=True)
+        return BypassError(
+            f"Unexpected error: {str(error)}",
+            cause=error
+        )
+
+    async def get_target_url(self) -> str:
+        """Get the target URL for the current config.
+
+        Returns:
+            Complete URL string, cached per config snapshot
+        """
+        config = await self._config_manager.get_config()
+        url, _ = self._resolve_target(config)
+        return url
+
     def _build_url(self, config: BypassConfig) -> str:
         """Build target URL from config.
 
@@ -162,9 +281,28 @@ class BypassHandler:
                 f"{config.target_port}{config.target_uri}"
             )
 
+    def _resolve_target(self, config: BypassConfig) -> Tuple[str, Optional[str]]:
+        """Get target URL and Authorization header for config.
+
+        Configs are immutable snapshots, so the derived values are cached
+        per snapshot and only rebuilt when the config changes.
+
+        Args:
+            config: Bypass configuration
+
+        Returns:
+            Tuple of (target_url, authorization header or None)
+        """
+        cached_config, url, auth = self._cached
+        if cached_config is not config:
+            url = self._build_url(config)
+            auth = f'Bearer {config.api_key}' if config.api_key else None
+            self._cached = (config, url, auth)
+        return url, auth
+
     def _prepare_headers(
         self,
-        original_headers: dict,
+        original_headers: Mapping[str, str],
         config: BypassConfig
     ) -> dict:
         """Prepare headers for forwarding.
@@ -176,18 +314,24 @@ class BypassHandler:
         Returns:
             Filtered and updated headers dict
         """
-        # Filter out hop-by-hop headers
+        # Filter out hop-by-hop headers, noting Content-Type in the same pass
         headers = {}
+        has_content_type = False
         for key, value in original_headers.items():
-            if key.lower() not in HOP_BY_HOP_HEADERS:
-                headers[key] = value
+            lower_key = key.lower()
+            if lower_key in HOP_BY_HOP_HEADERS:
+                continue
+            if lower_key == 'content-type':
+                has_content_type = True
+            headers[key] = value
 
         # Override or add Authorization if API key configured
-        if config.api_key:
-            headers['Authorization'] = f'Bearer {config.api_key}'
+        _, auth = self._resolve_target(config)
+        if auth:
+            headers['Authorization'] = auth
 
         # Ensure Content-Type
-        if 'content-type' not in {k.lower() for k in headers.keys()}:
+        if not has_content_type:
             headers['Content-Type'] = 'application/json'
 
         return headers
@@ -202,8 +346,14 @@ class BypassHandler:
             AsyncClient instance
         """
         if self._client is None or self._client.is_closed:
+            # Timeout is applied per request, so config changes take effect
+            # without rebuilding the pooled client.
             self._client = httpx.AsyncClient(
-                timeout=config.timeout,
+                transport=httpx.AsyncHTTPTransport(
+                    http2=True,
+                    limits=CLIENT_LIMITS,
+                ),
+                timeout=httpx.Timeout(None),
                 follow_redirects=True,
             )
         return self._client
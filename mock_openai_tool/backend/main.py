@@ -1,18 +1,25 @@
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import asyncio
-import uuid
+import itertools
+import os as _os
+import time
 import logging
+from typing import Mapping, Optional, Union
+
+import msgpack
+import orjson
 
 # 导入队列管理器、bypass配置和API路由
 from .queue_manager import PresetQueueManager
 from .bypass_config import BypassConfigManager
-from .bypass_handler import BypassHandler, BypassError
+from .bypass_handler import BypassHandler, BypassError, decode_response_body
+from .responses import ORJSONResponse
 from . import api_routes
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # 启用跨域
 app.add_middleware(
@@ -26,6 +33,46 @@ app.add_middleware(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("mock-queue")
 
+# 请求ID：进程内单调递增（从启动时的毫秒时间戳开始，避免重启后与前端历史记录冲突）
+_request_ids = itertools.count(int(time.time() * 1000))
+
+# 手动模式推送给前端的请求头（不复制全部请求头）
+_DISPLAY_HEADERS = ('user-agent', 'content-type', 'authorization')
+
+# 每个 WebSocket 客户端发送队列的最大长度
+WS_SEND_QUEUE_SIZE = 64
+
+# WebSocket 客户端数量上限（可通过环境变量配置）
+MAX_WS_CLIENTS = int(_os.environ.get('MAX_WS_CLIENTS', 500))
+
+# 手动模式等待队列的最大长度（可通过环境变量配置），超过时返回 503
+MAX_PENDING = int(_os.environ.get('MAX_PENDING', 100))
+
+# 发送队列连续满多少次后强制断开慢客户端
+WS_MAX_STRIKES = 3
+
+# 队列更新广播的合并窗口（秒）
+QUEUE_UPDATE_COALESCE_DELAY = 0.05
+
+# 丢弃消息告警的最小间隔（秒）
+_DROP_WARNING_INTERVAL = 1.0
+_last_drop_warning = 0.0
+
+
+class _ClientChannel:
+    """单个 WebSocket 客户端的发送通道"""
+
+    __slots__ = ('queue', 'strikes', 'writer', 'evicted', 'msgpack')
+
+    def __init__(self, use_msgpack: bool = False):
+        self.queue = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self.strikes = 0
+        self.writer = None
+        self.evicted = False
+        # 客户端通过 /ws?proto=msgpack 选择 MessagePack 二进制帧
+        self.msgpack = use_msgpack
+
+
 # 全局管理器
 queue_manager = None
 bypass_config_manager = None
@@ -33,7 +80,6 @@ bypass_handler = None
 
 
 # 条件性挂载前端（仅在目录存在时）
-import os as _os
 _frontend_path = "/app/mock_openai_tool/frontend"
 if _os.path.exists(_frontend_path):
     app.mount("/frontend", StaticFiles(directory=_frontend_path), name="frontend")
@@ -55,12 +101,13 @@ def index():
 @app.on_event("startup")
 async def initialize_globals():
     global pending_requests, current_request, request_futures, websocket_clients, queue_manager
-    global bypass_config_manager, bypass_handler
+    global bypass_config_manager, bypass_handler, pending_queue_updates
 
-    pending_requests = asyncio.Queue()
+    pending_requests = asyncio.Queue(maxsize=MAX_PENDING)
     current_request = None
     request_futures = {}
-    websocket_clients = set()
+    websocket_clients = {}
+    pending_queue_updates = {}
 
     # 初始化队列管理器
     queue_manager = PresetQueueManager(persistence_path="preset_queues.json")
@@ -82,6 +129,13 @@ async def initialize_globals():
     logger.info(f"Bypass mode: {'enabled' if config.enabled else 'disabled'}")
 
 
+# 关闭时写入未持久化的队列变更
+@app.on_event("shutdown")
+async def flush_on_shutdown():
+    if queue_manager is not None:
+        await queue_manager.flush()
+
+
 async def broadcast_websocket(message: dict):
     """
     通用WebSocket广播函数
@@ -89,16 +143,99 @@ async def broadcast_websocket(message: dict):
     Args:
         message: 要广播的消息字典
     """
-    disconnected_clients = set()
-    for ws in websocket_clients:
+    if not websocket_clients:
+        return
+    _broadcast_nowait(message)
+
+
+def _broadcast_nowait(message: dict):
+    """同步广播：序列化后放入各客户端发送队列"""
+    # 每种格式最多序列化一次，且仅在有客户端需要时才序列化
+    text_payload = None
+    binary_payload = None
+
+    # 只入队，由各客户端的发送任务负责实际发送，慢客户端不会阻塞调用方
+    dropped = 0
+    evicted = None
+    for ws, channel in websocket_clients.items():
+        if channel.msgpack:
+            if binary_payload is None:
+                binary_payload = _encode_message(message, use_msgpack=True)
+            payload = binary_payload
+        else:
+            if text_payload is None:
+                text_payload = _encode_message(message)
+            payload = text_payload
         try:
-            await ws.send_json(message)
-        except Exception as e:
-            logger.warning(f"Failed to send to WebSocket client: {e}")
-            disconnected_clients.add(ws)
+            channel.queue.put_nowait(payload)
+            channel.strikes = 0
+        except asyncio.QueueFull:
+            dropped += 1
+            channel.strikes += 1
+            if channel.strikes > WS_MAX_STRIKES:
+                if evicted is None:
+                    evicted = []
+                evicted.append(ws)
+
+    # 正常情况下无需任何额外处理，仅在有丢弃时处理
+    if dropped:
+        _warn_dropped(dropped)
+    if evicted:
+        for ws in evicted:
+            _evict_client(ws)
+
+
+def _warn_dropped(dropped: int):
+    """限频记录消息丢弃告警"""
+    global _last_drop_warning
+    now = time.monotonic()
+    if now - _last_drop_warning >= _DROP_WARNING_INTERVAL:
+        _last_drop_warning = now
+        logger.warning(f"WebSocket send queue full for {dropped} client(s), dropping message")
+
+
+def _evict_client(ws: WebSocket):
+    """移除慢客户端，由其发送任务负责关闭连接"""
+    channel = websocket_clients.pop(ws, None)
+    if channel is None:
+        return
+    logger.warning(f"Evicting slow WebSocket client after {channel.strikes} full-queue strikes")
+    channel.evicted = True
+    channel.writer.cancel()
 
-    # 清理断开的客户端
-    websocket_clients.difference_update(disconnected_clients)
+
+def _encode_message(message: dict, use_msgpack: bool = False) -> Union[str, bytes]:
+    """
+    序列化消息
+
+    默认返回 JSON 文本（以文本帧发送，前端使用 JSON.parse 解析）；
+    use_msgpack 为 True 时返回 MessagePack 字节（以二进制帧发送）。
+    """
+    if use_msgpack:
+        return msgpack.packb(message)
+    return orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+async def _websocket_writer(ws: WebSocket, channel: _ClientChannel):
+    """单个客户端的发送任务：依次发送队列中的消息"""
+    try:
+        while True:
+            payload = await channel.queue.get()
+            if channel.msgpack:
+                await ws.send_bytes(payload)
+            else:
+                await ws.send_text(payload)
+    except asyncio.CancelledError:
+        # 被驱逐的慢客户端：主动关闭连接
+        if channel.evicted:
+            try:
+                await ws.close(code=1008)
+            except Exception:
+                pass
+    except Exception as e:
+        logger.warning(f"Failed to send to WebSocket client: {e}")
+        # 清理断开的客户端
+        websocket_clients.pop(ws, None)
 
 
 async def broadcast_queue_update(event_type: str, ip: str = None):
@@ -109,31 +246,44 @@ async def broadcast_queue_update(event_type: str, ip: str = None):
         event_type: 事件类型（queue_updated, all_queues_updated）
         ip: 相关的IP地址（可选）
     """
-    message = {"type": event_type}
+    if not websocket_clients:
+        return
+
+    # 合并窗口内相同 (事件类型, IP) 的更新只发送一次
+    key = (event_type, ip)
+    if key in pending_queue_updates:
+        return
+    pending_queue_updates[key] = asyncio.get_running_loop().call_later(
+        QUEUE_UPDATE_COALESCE_DELAY, _flush_queue_update, event_type, ip
+    )
+
+
+def _flush_queue_update(event_type: str, ip: Optional[str]):
+    """合并窗口结束，发送一次带最新队列长度的更新"""
+    pending_queue_updates.pop((event_type, ip), None)
+    message = {"type": event_type, "lengths": queue_manager.snapshot_lengths()}
     if ip:
         message["ip"] = ip
-    await broadcast_websocket(message)
+    _broadcast_nowait(message)
 
 
 # 注册 API 路由
 app.include_router(api_routes.router)
 app.include_router(api_routes.bypass_router)
 
-async def _check_client_disconnect(request: Request, req_id: str):
+async def _watch_disconnect(request: Request, req_id: str, future: asyncio.Future):
     """
-    定期检查客户端是否断开连接
-    如果断开，自动清理请求
+    等待 ASGI 的 http.disconnect 消息（无需定时轮询）
+    客户端断开时取消等待中的 future
     """
     try:
         while True:
-            await asyncio.sleep(1)  # 每秒检查一次
-            if await request.is_disconnected():
+            message = await request.receive()
+            if message["type"] == "http.disconnect":
                 logger.warning(f"Client disconnected for request {req_id}")
-                # 如果 future 还存在且未完成，设置为取消状态
-                future = request_futures.get(req_id)
-                if future and not future.done():
+                if not future.done():
                     future.set_exception(asyncio.CancelledError("Client disconnected"))
-                break
+                return
     except asyncio.CancelledError:
         # 正常取消，客户端已收到响应
         pass
@@ -151,75 +301,112 @@ async def _cleanup_current_request(req_id: str):
         await process_next_request()
 
 
-async def handle_bypass_request(
+async def _stream_bypass_response(
+    request_id: str,
+    start_time: float,
     request_body: dict,
-    headers: dict,
+    headers: Mapping[str, str],
     client_ip: str
-) -> JSONResponse:
-    """处理 bypass 请求"""
-    import time
+) -> StreamingResponse:
+    """转发流式（stream=true）bypass 请求，边接收边返回给客户端"""
+    chunks, status_code, content_type = await bypass_handler.forward_stream_request(
+        request_body, headers, client_ip
+    )
 
-    request_id = str(uuid.uuid4())
-    start_time = time.time()
+    async def relay():
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+            # 流式响应不缓存响应体，仅通知前端完成状态
+            if websocket_clients:
+                await broadcast_websocket({
+                    "type": "bypass_response",
+                    "data": {
+                        "id": request_id,
+                        "timestamp": time.time(),
+                        "status_code": status_code,
+                        "response_body": None,
+                        "elapsed_ms": (time.time() - start_time) * 1000,
+                        "success": True
+                    }
+                })
 
-    # 构建目标 URL（用于展示）
-    config = await bypass_config_manager.get_config()
-    scheme = "https" if config.use_https else "http"
-    if (config.use_https and config.target_port == 443) or \
-       (not config.use_https and config.target_port == 80):
-        target_url = f"{scheme}://{config.target_host}{config.target_uri}"
-    else:
-        target_url = f"{scheme}://{config.target_host}:{config.target_port}{config.target_uri}"
-
-    # 通知前端请求开始
-    await broadcast_websocket({
-        "type": "bypass_request",
-        "data": {
-            "id": request_id,
-            "timestamp": start_time,
-            "client_ip": client_ip,
-            "request_body": request_body,
-            "target_url": target_url
-        }
-    })
+    return StreamingResponse(relay(), status_code=status_code, media_type=content_type)
 
-    try:
-        # 转发请求
-        response_body, status_code, elapsed = await bypass_handler.forward_request(
-            request_body, headers, client_ip
-        )
 
-        # 通知前端响应成功
+async def handle_bypass_request(
+    request_body: dict,
+    headers: Mapping[str, str],
+    client_ip: str
+) -> Response:
+    """处理 bypass 请求"""
+    request_id = str(next(_request_ids))
+    start_time = time.time()
+
+    # 通知前端请求开始（目标 URL 仅用于展示，按配置快照缓存）
+    if websocket_clients:
+        target_url = await bypass_handler.get_target_url()
         await broadcast_websocket({
-            "type": "bypass_response",
+            "type": "bypass_request",
             "data": {
                 "id": request_id,
-                "timestamp": time.time(),
-                "status_code": status_code,
-                "response_body": response_body,
-                "elapsed_ms": elapsed * 1000,
-                "success": True
+                "timestamp": start_time,
+                "client_ip": client_ip,
+                "request_body": request_body,
+                "target_url": target_url
             }
         })
 
-        return JSONResponse(content=response_body, status_code=status_code)
+    try:
+        if request_body.get("stream"):
+            return await _stream_bypass_response(
+                request_id, start_time, request_body, headers, client_ip
+            )
+
+        # 转发请求（响应体为原始字节）
+        response_body, status_code, content_type, elapsed = \
+            await bypass_handler.forward_request(request_body, headers, client_ip)
+
+        # 通知前端响应成功
+        if websocket_clients:
+            await broadcast_websocket({
+                "type": "bypass_response",
+                "data": {
+                    "id": request_id,
+                    "timestamp": time.time(),
+                    "status_code": status_code,
+                    "response_body": decode_response_body(response_body, status_code),
+                    "elapsed_ms": elapsed * 1000,
+                    "success": True
+                }
+            })
+
+        # 原样透传上游响应，避免解析后再序列化
+        return Response(
+            content=response_body,
+            status_code=status_code,
+            media_type=content_type
+        )
 
     except BypassError as e:
         # 通知前端响应失败
-        await broadcast_websocket({
-            "type": "bypass_response",
-            "data": {
-                "id": request_id,
-                "timestamp": time.time(),
-                "status_code": 502,
-                "response_body": {"error": e.message},
-                "elapsed_ms": (time.time() - start_time) * 1000,
-                "success": False,
-                "error": e.message
-            }
-        })
-
-        return JSONResponse(
+        if websocket_clients:
+            await broadcast_websocket({
+                "type": "bypass_response",
+                "data": {
+                    "id": request_id,
+                    "timestamp": time.time(),
+                    "status_code": 502,
+                    "response_body": {"error": e.message},
+                    "elapsed_ms": (time.time() - start_time) * 1000,
+                    "success": False,
+                    "error": e.message
+                }
+            })
+
+        return ORJSONResponse(
             content={"error": e.message},
             status_code=502
         )
@@ -227,14 +414,14 @@ async def handle_bypass_request(
 
 @app.post("/v1/chat/completions")
 async def handle_completion(request: Request):
-    body = await request.json()
+    body = orjson.loads(await request.body())
     client_ip = request.client.host
     client_port = request.client.port
-    req_id = str(uuid.uuid4())
+    req_id = str(next(_request_ids))
 
     # Priority 1: Check bypass mode (highest priority)
-    if await bypass_config_manager.is_enabled():
-        return await handle_bypass_request(body, dict(request.headers), client_ip)
+    if bypass_config_manager.enabled_fast():
+        return await handle_bypass_request(body, request.headers, client_ip)
 
     # Priority 2: 检查预设队列，如果有预设响应则直接返回
     preset_result = await queue_manager.check_and_pop(client_ip)
@@ -246,24 +433,20 @@ async def handle_completion(request: Request):
         await broadcast_queue_update("queue_updated", client_ip)
 
         # 广播已完成的请求到前端（左侧历史记录）
-        completed_data = {
-            "type": "completed_request",
-            "data": {
-                "id": req_id,
-                "ip": client_ip,
-                "port": client_port,
-                "body": body,
-                "response": response_data,
-                "status_code": status_code
-            }
-        }
-        for ws in websocket_clients:
-            try:
-                await ws.send_json(completed_data)
-            except Exception as e:
-                logger.warning(f"Failed to send completed_request to WebSocket: {e}")
-
-        return JSONResponse(content=response_data, status_code=status_code)
+        if websocket_clients:
+            await broadcast_websocket({
+                "type": "completed_request",
+                "data": {
+                    "id": req_id,
+                    "ip": client_ip,
+                    "port": client_port,
+                    "body": body,
+                    "response": response_data,
+                    "status_code": status_code
+                }
+            })
+
+        return ORJSONResponse(content=response_data, status_code=status_code)
 
     # 队列为空，进入手动模式
     future = asyncio.get_event_loop().create_future()
@@ -275,23 +458,31 @@ async def handle_completion(request: Request):
         "port": client_port,
         "method": "POST",
         "path": "/v1/completions",
-        "headers": dict(request.headers),
+        "headers": {
+            k: request.headers[k] for k in _DISPLAY_HEADERS if k in request.headers
+        },
         "body": body,
         "timestamp": str(asyncio.get_event_loop().time()),
         "status": "pending"
     }
 
-    await pending_requests.put(request_obj)
+    try:
+        pending_requests.put_nowait(request_obj)
+    except asyncio.QueueFull:
+        request_futures.pop(req_id, None)
+        logger.warning(f"Pending queue full, rejecting request {req_id} from {client_ip}")
+        return ORJSONResponse(content={"error": "Server overloaded"}, status_code=503)
     logger.info(f"Queued request: {req_id} from {client_ip}:{client_port}")
     await process_next_request()
 
     try:
-        # 创建客户端断开检测任务
-        disconnect_task = asyncio.create_task(_check_client_disconnect(request, req_id))
+        # 创建客户端断开检测任务（手动模式每个请求仅此一个任务，
+        # 等待 future 本身不创建任务；预设队列和 bypass 路径不创建任何任务）
+        disconnect_task = asyncio.create_task(_watch_disconnect(request, req_id, future))
 
         try:
             response_data, status_code = await asyncio.wait_for(future, timeout=300)
-            return JSONResponse(content=response_data, status_code=status_code)
+            return ORJSONResponse(content=response_data, status_code=status_code)
         finally:
             # 取消断开检测任务
             disconnect_task.cancel()
@@ -302,10 +493,10 @@ async def handle_completion(request: Request):
 
     except asyncio.CancelledError:
         logger.warning(f"Request {req_id} cancelled (client disconnected)")
-        return JSONResponse(content={"error": "Request cancelled - client disconnected"}, status_code=499)
+        return ORJSONResponse(content={"error": "Request cancelled - client disconnected"}, status_code=499)
     except asyncio.TimeoutError:
         logger.warning(f"Request {req_id} timed out")
-        return JSONResponse(content={"error": "Timeout waiting for mock response"}, status_code=504)
+        return ORJSONResponse(content={"error": "Timeout waiting for mock response"}, status_code=504)
     finally:
         # 清理 future
         request_futures.pop(req_id, None)
@@ -322,8 +513,8 @@ async def process_next_request():
     current_request = await pending_requests.get()
     logger.info(f"Processing request: {current_request['id']}")
 
-    for ws in websocket_clients:
-        await ws.send_json({
+    if websocket_clients:
+        await broadcast_websocket({
             "type": "new_request",
             "data": current_request
         })
@@ -334,13 +525,22 @@ async def process_next_request():
 async def websocket_endpoint(ws: WebSocket):
     global websocket_clients, current_request
     await ws.accept()
-    websocket_clients.add(ws)
-    
+
+    # 超过客户端数量上限，拒绝连接（1013: Try Again Later）
+    if len(websocket_clients) >= MAX_WS_CLIENTS:
+        logger.warning(f"Rejecting WebSocket client: limit of {MAX_WS_CLIENTS} reached")
+        await ws.close(code=1013)
+        return
+
+    channel = _ClientChannel(use_msgpack=ws.query_params.get("proto") == "msgpack")
+    channel.writer = asyncio.create_task(_websocket_writer(ws, channel))
+    websocket_clients[ws] = channel
+
     if current_request:
-        await ws.send_json({
+        channel.queue.put_nowait(_encode_message({
             "type": "new_request",
             "data": current_request
-        })
+        }, use_msgpack=channel.msgpack))
 
     try:
         while True:
@@ -369,13 +569,16 @@ async def websocket_endpoint(ws: WebSocket):
                         }
                     }
 
-                    for ws_client in websocket_clients:
-                        await ws_client.send_json(completed_data)
+                    await broadcast_websocket(completed_data)
 
                     current_request = None
                     await process_next_request()
 
     except WebSocketDisconnect:
-        websocket_clients.remove(ws)
+        pass
+    finally:
+        if websocket_clients.get(ws) is channel:
+            del websocket_clients[ws]
+            channel.writer.cancel()
 
     
\ No newline at end of file
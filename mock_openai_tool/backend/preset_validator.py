@@ -2,8 +2,21 @@
 PresetValidator - JSON格式验证器
 """
 import json
+from functools import lru_cache
 from typing import Tuple, Optional, List
 
+import orjson
+
+
+@lru_cache(maxsize=256)
+def _parse_cached(data: str):
+    """
+    解析JSON字符串并缓存结果（重复提交相同内容时跳过解析）
+
+    注意：命中缓存时返回的是同一个对象，调用方不应修改返回值。
+    """
+    return json.loads(data)
+
 
 class PresetValidator:
     """预设响应验证器"""
@@ -18,9 +31,11 @@ class PresetValidator:
 
         Returns:
             (is_valid, parsed_data, error_message)
+
+        解析结果经过 LRU 缓存，相同字符串返回共享对象，不要原地修改。
         """
         try:
-            parsed = json.loads(data)
+            parsed = _parse_cached(data)
             return (True, parsed, None)
         except json.JSONDecodeError as e:
             error_msg = f"JSON格式错误: 行{e.lineno} 列{e.colno} - {e.msg}"
@@ -66,6 +81,28 @@ class PresetValidator:
 
         return (True, parsed, None)
 
+    @staticmethod
+    def validate_import_bytes(data: bytes) -> Tuple[bool, Optional[List], Optional[str]]:
+        """
+        验证导入的JSON数组（直接解析UTF-8字节，无需先解码为字符串）
+
+        Args:
+            data: 上传文件的原始字节
+
+        Returns:
+            (is_valid, parsed_array, error_message)
+        """
+        try:
+            parsed = orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            error_msg = f"JSON格式错误: 行{e.lineno} 列{e.colno} - {e.msg}"
+            return (False, None, error_msg)
+
+        if not isinstance(parsed, list):
+            return (False, None, "导入文件必须是JSON数组")
+
+        return (True, parsed, None)
+
     @staticmethod
     def validate_array_elements(arr: List) -> List[Tuple[int, str]]:
         """
@@ -5,13 +5,31 @@ from collections import deque
 from typing import Dict, Deque, Optional, List, Tuple
 import uuid
 import asyncio
-import json
 import os
 import logging
 import time
 
+import orjson
+
 logger = logging.getLogger("preset-queue")
 
+# 持久化防抖间隔（秒）：窗口内的多次变更合并为一次写入
+PERSIST_DEBOUNCE = 0.05
+
+
+def _write_snapshot(path: str, data: dict):
+    """同步写入快照（在线程池中执行），先写临时文件再原子替换"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(data))
+    os.replace(tmp_path, path)
+
+
+def _read_snapshot(path: str) -> dict:
+    """同步读取快照（在线程池中执行）"""
+    with open(path, 'rb') as f:
+        return orjson.loads(f.read())
+
 
 class PresetQueueManager:
     """
@@ -25,8 +43,21 @@ class PresetQueueManager:
 
     def __init__(self, persistence_path: str = "preset_queues.json"):
         self._queues: Dict[str, Deque] = {}
+        # 全局锁：仅用于跨IP操作（清空全部队列、持久化快照）
         self._lock = asyncio.Lock()
+        # 每个IP独立的锁，不同IP的操作互不阻塞
+        self._locks: Dict[str, asyncio.Lock] = {}
         self._persistence_path = persistence_path
+        self._dirty = asyncio.Event()
+        self._closing = False
+        self._writer_task: Optional[asyncio.Task] = None
+
+    def _ip_lock(self, ip: str) -> asyncio.Lock:
+        """获取指定IP的锁（不存在则创建；无 await，事件循环内原子）"""
+        lock = self._locks.get(ip)
+        if lock is None:
+            lock = self._locks[ip] = asyncio.Lock()
+        return lock
 
     async def add_response(self, ip: str, response: dict, status_code: int = 200) -> str:
         """
@@ -40,7 +71,7 @@ class PresetQueueManager:
         Returns:
             response_id: 分配的唯一ID
         """
-        async with self._lock:
+        async with self._ip_lock(ip):
             if ip not in self._queues:
                 self._queues[ip] = deque()
 
@@ -56,6 +87,39 @@ class PresetQueueManager:
             await self._persist_async()
             return response_id
 
+    async def add_responses_bulk(
+        self, ip: str, responses: List[dict], status_code: int = 200
+    ) -> List[str]:
+        """
+        批量添加响应到指定IP队列（只获取一次锁、只持久化一次）
+
+        Args:
+            ip: 源IP地址
+            responses: 响应体列表（已验证的JSON）
+            status_code: HTTP状态码
+
+        Returns:
+            分配的唯一ID列表（与 responses 顺序一致）
+        """
+        async with self._ip_lock(ip):
+            if ip not in self._queues:
+                self._queues[ip] = deque()
+
+            now = time.time()
+            preset_items = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "response": response,
+                    "status_code": status_code,
+                    "created_at": now
+                }
+                for response in responses
+            ]
+
+            self._queues[ip].extend(preset_items)
+            await self._persist_async()
+            return [item["id"] for item in preset_items]
+
     async def check_and_pop(self, ip: str) -> Optional[Tuple[dict, int]]:
         """
         检查并弹出指定IP的队列头部响应
@@ -66,7 +130,7 @@ class PresetQueueManager:
         Returns:
             (response, status_code) 或 None（队列为空或不存在）
         """
-        async with self._lock:
+        async with self._ip_lock(ip):
             if ip not in self._queues or not self._queues[ip]:
                 return None
 
@@ -75,37 +139,37 @@ class PresetQueueManager:
             return (preset_item["response"], preset_item["status_code"])
 
     async def get_queue(self, ip: str) -> List[dict]:
-        """获取指定IP的队列内容（不移除）"""
-        async with self._lock:
-            if ip not in self._queues:
-                return []
-            return list(self._queues[ip])
+        """
+        获取指定IP的队列内容（不移除）
+
+        读取不获取锁：复制过程中没有 await，事件循环内不会与写操作交错，
+        且所有写操作在每个 await 点都保持队列状态一致。
+        """
+        queue = self._queues.get(ip)
+        return list(queue) if queue is not None else []
 
     async def get_all_queues(self) -> Dict[str, List[dict]]:
-        """获取所有队列"""
-        async with self._lock:
-            return {ip: list(queue) for ip, queue in self._queues.items()}
+        """获取所有队列（不获取锁，原因同 get_queue）"""
+        return {ip: list(queue) for ip, queue in self._queues.items()}
 
     async def delete_response(self, ip: str, response_id: str) -> bool:
         """删除指定响应"""
-        async with self._lock:
+        async with self._ip_lock(ip):
             if ip not in self._queues:
                 return False
 
-            original_len = len(self._queues[ip])
-            self._queues[ip] = deque([
-                item for item in self._queues[ip]
-                if item["id"] != response_id
-            ])
-
-            if len(self._queues[ip]) < original_len:
-                await self._persist_async()
-                return True
+            # 原地删除，保留 deque 对象，不复制整个队列
+            queue = self._queues[ip]
+            for idx, item in enumerate(queue):
+                if item["id"] == response_id:
+                    del queue[idx]
+                    await self._persist_async()
+                    return True
             return False
 
     async def clear_queue(self, ip: str) -> bool:
         """清空指定IP队列"""
-        async with self._lock:
+        async with self._ip_lock(ip):
             if ip in self._queues:
                 self._queues[ip].clear()
                 await self._persist_async()
@@ -114,7 +178,7 @@ class PresetQueueManager:
 
     async def delete_queue(self, ip: str) -> bool:
         """删除整个IP队列"""
-        async with self._lock:
+        async with self._ip_lock(ip):
             if ip in self._queues:
                 del self._queues[ip]
                 await self._persist_async()
@@ -131,20 +195,52 @@ class PresetQueueManager:
         """获取队列长度（同步，不需要锁）"""
         return len(self._queues.get(ip, []))
 
+    def snapshot_lengths(self) -> Dict[str, int]:
+        """获取所有队列长度快照（同步，不需要锁）"""
+        return {ip: len(queue) for ip, queue in self._queues.items()}
+
     async def _persist_async(self):
-        """异步持久化到文件"""
-        # 在后台任务中执行，避免阻塞
-        asyncio.create_task(self._persist())
+        """标记数据已变更，由后台写入任务合并后持久化"""
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        self._dirty.set()
+
+    async def _writer_loop(self):
+        """后台写入任务：等待变更，防抖后一次性写入"""
+        while True:
+            await self._dirty.wait()
+            if not self._closing:
+                await asyncio.sleep(PERSIST_DEBOUNCE)
+            self._dirty.clear()
+            await self._persist()
+            if self._closing:
+                return
+
+    async def flush(self):
+        """立即写入未持久化的变更并结束后台写入任务（关闭时调用）"""
+        task = self._writer_task
+        if task is None or task.done():
+            return
+
+        self._closing = True
+        self._dirty.set()
+        try:
+            await task
+        finally:
+            self._closing = False
+            self._writer_task = None
 
     async def _persist(self):
         """持久化队列到JSON文件"""
         try:
-            data = {
-                ip: list(queue)
-                for ip, queue in self._queues.items()
-            }
-            with open(self._persistence_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            async with self._lock:
+                data = {
+                    ip: list(queue)
+                    for ip, queue in self._queues.items()
+                }
+            await asyncio.get_running_loop().run_in_executor(
+                None, _write_snapshot, self._persistence_path, data
+            )
         except Exception as e:
             logger.error(f"Failed to persist queues: {e}")
 
@@ -152,12 +248,13 @@ class PresetQueueManager:
         """从文件加载队列"""
         try:
             if os.path.exists(self._persistence_path):
-                with open(self._persistence_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self._queues = {
-                        ip: deque(queue)
-                        for ip, queue in data.items()
-                    }
+                data = await asyncio.get_running_loop().run_in_executor(
+                    None, _read_snapshot, self._persistence_path
+                )
+                self._queues = {
+                    ip: deque(queue)
+                    for ip, queue in data.items()
+                }
                 logger.info(f"Loaded {len(self._queues)} queues from {self._persistence_path}")
         except Exception as e:
             logger.error(f"Failed to load queues: {e}")
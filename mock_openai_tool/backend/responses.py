@@ -0,0 +1,14 @@
+"""
+基于 orjson 的响应类
+"""
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """使用 orjson 序列化的 JSON 响应（直接输出 UTF-8 字节）"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
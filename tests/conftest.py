@@ -2,20 +2,12 @@
 Pytest configuration and shared fixtures
 """
 import pytest
-import asyncio
-import tempfile
-import os
 
 
 @pytest.fixture
-def temp_file():
-    """提供临时文件路径"""
-    fd, path = tempfile.mkstemp(suffix='.json')
-    os.close(fd)
-    yield path
-    # 清理
-    if os.path.exists(path):
-        os.remove(path)
+def temp_file(tmp_path_factory):
+    """提供临时文件路径（目录由 pytest 自动清理）"""
+    return str(tmp_path_factory.mktemp('q') / 'preset_queues.json')
 
 
 @pytest.fixture
@@ -24,3 +16,4 @@ async def queue_manager(temp_file):
     from mock_openai_tool.backend.queue_manager import PresetQueueManager
     manager = PresetQueueManager(persistence_path=temp_file)
     yield manager
+    await manager.flush()
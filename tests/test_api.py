@@ -7,12 +7,23 @@ import tempfile
 from fastapi.testclient import TestClient
 
 
-@pytest.fixture
-def client():
-    """创建测试客户端"""
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    """创建测试客户端（模块内共享，启动事件只执行一次）"""
     # 延迟导入以避免循环依赖
     from mock_openai_tool.backend.main import app
-    return TestClient(app)
+
+    # 在临时目录中运行，持久化文件不写入仓库
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("app"))
+        with TestClient(app) as c:
+            yield c
+
+
+@pytest.fixture(autouse=True)
+def reset_queues(client):
+    """每个测试前清空所有队列"""
+    client.delete("/api/preset-queue")
 
 
 class TestGetQueues:
@@ -7,11 +7,22 @@ import json
 from fastapi.testclient import TestClient
 
 
-@pytest.fixture
-def client():
-    """创建测试客户端"""
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    """创建测试客户端（模块内共享，启动事件只执行一次）"""
     from mock_openai_tool.backend.main import app
-    return TestClient(app)
+
+    # 在临时目录中运行，持久化文件不写入仓库
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("app"))
+        with TestClient(app) as c:
+            yield c
+
+
+@pytest.fixture(autouse=True)
+def reset_queues(client):
+    """每个测试前清空所有队列"""
+    client.delete("/api/preset-queue")
 
 
 class TestAutoResponse:
@@ -328,3 +339,27 @@ class TestAutoResponseEdgeCases:
 
         queue = client.get("/api/preset-queue/192.168.1.100")
         assert queue.json()["count"] == 1
+
+
+class TestManualModeBackpressure:
+    """测试手动模式等待队列的背压"""
+
+    def test_pending_queue_full_returns_503(self, tmp_path, monkeypatch):
+        """测试等待队列已满时立即返回503"""
+        import mock_openai_tool.backend.main as main_module
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(main_module, "MAX_PENDING", 1)
+
+        with TestClient(main_module.app) as client:
+            # 模拟操作员正在处理一个请求，且等待队列已满
+            main_module.current_request = {"id": "busy"}
+            main_module.pending_requests.put_nowait({"id": "waiting"})
+
+            response = client.post("/v1/chat/completions", json={"messages": []})
+
+            assert response.status_code == 503
+            assert response.json() == {"error": "Server overloaded"}
+            assert main_module.request_futures == {}
+
+            main_module.current_request = None
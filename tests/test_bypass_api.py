@@ -30,6 +30,8 @@ def client_with_bypass(temp_bypass_file):
 
         queue_mgr = Mock()
         queue_mgr.load = AsyncMock()
+        queue_mgr.flush = AsyncMock()
+        queue_mgr.snapshot_lengths = Mock(return_value={})
         queue_mgr.get_all_queues = AsyncMock(return_value={})
 
         MockBypass.return_value = bypass_mgr
@@ -3,6 +3,7 @@
 import asyncio
 import json
 import tempfile
+from dataclasses import FrozenInstanceError
 from pathlib import Path
 
 import pytest
@@ -85,6 +86,18 @@ async def test_enable_disable(manager):
     assert await manager.is_enabled() is False
 
 
+@pytest.mark.asyncio
+async def test_enabled_fast_tracks_enable_disable(manager):
+    """Test enabled_fast reflects enable/disable without awaiting."""
+    assert manager.enabled_fast() is False
+
+    await manager.enable()
+    assert manager.enabled_fast() is True
+
+    await manager.disable()
+    assert manager.enabled_fast() is False
+
+
 @pytest.mark.asyncio
 async def test_enable_with_valid_config(manager):
     """Test enable succeeds with valid default config."""
@@ -124,6 +137,13 @@ async def test_validate_invalid_host(manager):
         await manager.update_config(target_host="invalid host with spaces")
 
 
+@pytest.mark.asyncio
+async def test_validate_host_trailing_newline(manager):
+    """Test host with a trailing newline is rejected."""
+    with pytest.raises(ConfigValidationError, match="target_host"):
+        await manager.update_config(target_host="example.com\n")
+
+
 @pytest.mark.asyncio
 async def test_validate_empty_host(manager):
     """Test validation of empty host."""
@@ -193,16 +213,28 @@ async def test_concurrent_access(manager):
 
 
 @pytest.mark.asyncio
-async def test_get_config_returns_copy(manager):
-    """Test get_config returns a copy, not reference."""
+async def test_get_config_returns_immutable_snapshot(manager):
+    """Test get_config returns a snapshot that cannot be mutated."""
     config1 = await manager.get_config()
-    config1.target_host = "modified.com"
+    with pytest.raises(FrozenInstanceError):
+        config1.target_host = "modified.com"
 
     config2 = await manager.get_config()
-    assert config2.target_host != "modified.com"
     assert config2.target_host == "api.openai.com"
 
 
+@pytest.mark.asyncio
+async def test_update_config_publishes_new_snapshot(manager):
+    """Test updates replace the snapshot instead of mutating it."""
+    config1 = await manager.get_config()
+    await manager.update_config(target_host="new.com")
+
+    config2 = await manager.get_config()
+    assert config1.target_host == "api.openai.com"
+    assert config2.target_host == "new.com"
+    assert config2 is not config1
+
+
 @pytest.mark.asyncio
 async def test_valid_ip_address_as_host(manager):
     """Test IP address is valid as host."""
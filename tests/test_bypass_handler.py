@@ -12,6 +12,7 @@ from mock_openai_tool.backend.bypass_handler import (
     BypassHandler,
     BypassError,
     HOP_BY_HOP_HEADERS,
+    decode_response_body,
 )
 
 
@@ -149,15 +150,40 @@ def test_prepare_headers_adds_content_type_if_missing(handler):
     assert headers["Content-Type"] == "application/json"
 
 
+def test_resolve_target_cached_per_config(handler):
+    """Test target URL is reused until the config snapshot changes."""
+    config = BypassConfig(target_host="api.example.com", api_key="sk-1")
+
+    url1, auth1 = handler._resolve_target(config)
+    url2, auth2 = handler._resolve_target(config)
+    assert url1 is url2
+    assert auth1 == "Bearer sk-1"
+
+    new_config = BypassConfig(target_host="other.example.com", api_key=None)
+    url3, auth3 = handler._resolve_target(new_config)
+    assert url3 == "http://other.example.com:443/v1/chat/completions"
+    assert auth3 is None
+
+
+@pytest.mark.asyncio
+async def test_get_target_url(handler):
+    """Test get_target_url returns the cached URL for the current config."""
+    url1 = await handler.get_target_url()
+    url2 = await handler.get_target_url()
+
+    assert url1 == "https://api.example.com/v1/chat/completions"
+    assert url2 is url1
+
+
 @pytest.mark.asyncio
 async def test_forward_request_success(handler, mock_config_manager):
     """Test successful request forwarding."""
     mock_response = Mock()
     mock_response.status_code = 200
-    mock_response.json.return_value = {
-        "id": "test-response",
-        "choices": [{"message": {"content": "Hello"}}]
-    }
+    mock_response.headers = {"content-type": "application/json"}
+    mock_response.content = (
+        b'{"id": "test-response", "choices": [{"message": {"content": "Hello"}}]}'
+    )
 
     mock_client = AsyncMock()
     mock_client.post = AsyncMock(return_value=mock_response)
@@ -167,14 +193,16 @@ async def test_forward_request_success(handler, mock_config_manager):
         request_body = {"messages": [{"role": "user", "content": "Hi"}]}
         original_headers = {"Authorization": "Bearer test"}
 
-        response_body, status_code, elapsed = await handler.forward_request(
-            request_body=request_body,
-            original_headers=original_headers,
-            client_ip="192.168.1.1"
-        )
+        response_body, status_code, content_type, elapsed = \
+            await handler.forward_request(
+                request_body=request_body,
+                original_headers=original_headers,
+                client_ip="192.168.1.1"
+            )
 
         assert status_code == 200
-        assert response_body["id"] == "test-response"
+        assert response_body == mock_response.content
+        assert content_type == "application/json"
         assert elapsed >= 0
 
 
@@ -223,8 +251,8 @@ async def test_forward_request_non_json_response(handler, mock_config_manager):
     """Test handling of non-JSON response."""
     mock_response = Mock()
     mock_response.status_code = 500
-    mock_response.json.side_effect = ValueError("Not JSON")
-    mock_response.text = "Internal Server Error"
+    mock_response.headers = {"content-type": "text/plain"}
+    mock_response.content = b"Internal Server Error"
 
     mock_client = AsyncMock()
     mock_client.post = AsyncMock(return_value=mock_response)
@@ -234,15 +262,77 @@ async def test_forward_request_non_json_response(handler, mock_config_manager):
         request_body = {"messages": []}
         original_headers = {}
 
-        response_body, status_code, elapsed = await handler.forward_request(
-            request_body=request_body,
-            original_headers=original_headers,
+        response_body, status_code, content_type, elapsed = \
+            await handler.forward_request(
+                request_body=request_body,
+                original_headers=original_headers,
+                client_ip="192.168.1.1"
+            )
+
+        # Body is passed through untouched
+        assert status_code == 500
+        assert response_body == b"Internal Server Error"
+        assert content_type == "text/plain"
+
+
+@pytest.mark.asyncio
+async def test_forward_stream_request(handler, mock_config_manager):
+    """Test streaming request relays upstream chunks."""
+    sse = b'data: {"id": "1"}\n\ndata: [DONE]\n\n'
+
+    def respond(request):
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            content=sse,
+        )
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+
+    with patch.object(handler, '_get_client', return_value=client):
+        chunks, status_code, content_type = await handler.forward_stream_request(
+            request_body={"messages": [], "stream": True},
+            original_headers={},
             client_ip="192.168.1.1"
         )
+        body = b"".join([chunk async for chunk in chunks])
 
-        assert status_code == 500
-        assert "error" in response_body
-        assert response_body["error"]["message"] == "Internal Server Error"
+    assert status_code == 200
+    assert content_type == "text/event-stream"
+    assert body == sse
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_forward_stream_request_connection_error(handler, mock_config_manager):
+    """Test streaming request connection error handling."""
+    def respond(request):
+        raise httpx.ConnectError("Connection refused")
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(respond))
+
+    with patch.object(handler, '_get_client', return_value=client):
+        with pytest.raises(BypassError, match="Failed to connect"):
+            await handler.forward_stream_request(
+                request_body={"messages": [], "stream": True},
+                original_headers={},
+                client_ip="192.168.1.1"
+            )
+    await client.aclose()
+
+
+def test_decode_response_body_json():
+    """Test JSON bodies are decoded as-is."""
+    assert decode_response_body(b'{"id": "x"}', 200) == {"id": "x"}
+
+
+def test_decode_response_body_non_json():
+    """Test non-JSON bodies are wrapped in error format."""
+    response_body = decode_response_body(b"Internal Server Error", 500)
+
+    assert response_body["error"]["message"] == "Internal Server Error"
+    assert response_body["error"]["type"] == "api_error"
+    assert response_body["error"]["code"] == 500
 
 
 @pytest.mark.asyncio
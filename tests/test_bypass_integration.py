@@ -39,6 +39,8 @@ def client(temp_files):
         bypass_mgr = BypassConfigManager(config_file=temp_files['bypass'])
         queue_mgr_instance = Mock()
         queue_mgr_instance.load = AsyncMock()
+        queue_mgr_instance.flush = AsyncMock()
+        queue_mgr_instance.snapshot_lengths = Mock(return_value={})
         queue_mgr_instance.get_all_queues = AsyncMock(return_value={})
         queue_mgr_instance.check_and_pop = AsyncMock(return_value=None)
 
@@ -92,7 +94,9 @@ async def test_bypass_enabled_skips_preset_queue(client):
     with patch.object(
         main_module.bypass_handler,
         'forward_request',
-        AsyncMock(return_value=({"response": "from bypass"}, 200, 0.1))
+        AsyncMock(return_value=(
+            b'{"response": "from bypass"}', 200, "application/json", 0.1
+        ))
     ):
         response = client.post(
             "/v1/chat/completions",
@@ -123,12 +127,14 @@ async def test_bypass_request_broadcasts_websocket_events(client):
     with patch.object(
         main_module.bypass_handler,
         'forward_request',
-        AsyncMock(return_value=({"response": "success"}, 200, 0.5))
+        AsyncMock(return_value=(
+            b'{"response": "success"}', 200, "application/json", 0.5
+        ))
     ), patch.object(
         main_module,
         'broadcast_websocket',
         side_effect=mock_broadcast
-    ):
+    ), patch.dict(main_module.websocket_clients, {Mock(): Mock()}):
         response = client.post(
             "/v1/chat/completions",
             json={"messages": [{"role": "user", "content": "test"}]}
@@ -146,6 +152,7 @@ async def test_bypass_request_broadcasts_websocket_events(client):
     assert broadcast_messages[1]["type"] == "bypass_response"
     assert broadcast_messages[1]["data"]["success"] is True
     assert broadcast_messages[1]["data"]["status_code"] == 200
+    assert broadcast_messages[1]["data"]["response_body"] == {"response": "success"}
 
 
 @pytest.mark.asyncio
@@ -173,7 +180,7 @@ async def test_bypass_error_broadcasts_failure_event(client):
         main_module,
         'broadcast_websocket',
         side_effect=mock_broadcast
-    ):
+    ), patch.dict(main_module.websocket_clients, {Mock(): Mock()}):
         response = client.post(
             "/v1/chat/completions",
             json={"messages": [{"role": "user", "content": "test"}]}
@@ -191,6 +198,48 @@ async def test_bypass_error_broadcasts_failure_event(client):
     assert "Connection failed" in broadcast_messages[1]["data"]["error"]
 
 
+@pytest.mark.asyncio
+async def test_bypass_streaming_request(client):
+    """Test that stream=true requests are relayed as a streaming response."""
+    import mock_openai_tool.backend.api_routes as api_routes
+    import mock_openai_tool.backend.main as main_module
+
+    await api_routes.bypass_config_manager.enable()
+
+    async def chunks():
+        yield b'data: {"id": "1"}\n\n'
+        yield b'data: [DONE]\n\n'
+
+    broadcast_messages = []
+
+    async def mock_broadcast(message):
+        broadcast_messages.append(message)
+
+    with patch.object(
+        main_module.bypass_handler,
+        'forward_stream_request',
+        AsyncMock(return_value=(chunks(), 200, "text/event-stream"))
+    ), patch.object(
+        main_module,
+        'broadcast_websocket',
+        side_effect=mock_broadcast
+    ), patch.dict(main_module.websocket_clients, {Mock(): Mock()}):
+        response = client.post(
+            "/v1/chat/completions",
+            json={"messages": [{"role": "user", "content": "test"}], "stream": True}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.content == b'data: {"id": "1"}\n\ndata: [DONE]\n\n'
+
+    # Request and completion events are still broadcast
+    assert [m["type"] for m in broadcast_messages] == [
+        "bypass_request", "bypass_response"
+    ]
+    assert broadcast_messages[1]["data"]["success"] is True
+
+
 @pytest.mark.asyncio
 async def test_bypass_priority_over_queue(client):
     """Test that bypass has higher priority than preset queue."""
@@ -207,7 +256,9 @@ async def test_bypass_priority_over_queue(client):
     with patch.object(
         main_module.bypass_handler,
         'forward_request',
-        AsyncMock(return_value=({"response": "from bypass"}, 200, 0.1))
+        AsyncMock(return_value=(
+            b'{"response": "from bypass"}', 200, "application/json", 0.1
+        ))
     ):
         response = client.post(
             "/v1/chat/completions",
@@ -242,3 +293,29 @@ async def test_disable_bypass_restores_normal_flow(client):
 
     # Should use preset queue, not bypass
     assert response.json() == {"response": "from queue"}
+
+
+@pytest.mark.asyncio
+async def test_bypass_without_websocket_clients_skips_broadcast(client):
+    """Test that no broadcast payloads are built when nobody is listening."""
+    import mock_openai_tool.backend.api_routes as api_routes
+    import mock_openai_tool.backend.main as main_module
+
+    await api_routes.bypass_config_manager.enable()
+
+    broadcast = AsyncMock()
+    with patch.object(
+        main_module.bypass_handler,
+        'forward_request',
+        AsyncMock(return_value=(b'{"ok": true}', 200, "application/json", 0.1))
+    ), patch.object(
+        main_module, 'broadcast_websocket', broadcast
+    ), patch.dict(main_module.websocket_clients, clear=True):
+        response = client.post(
+            "/v1/chat/completions",
+            json={"messages": [{"role": "user", "content": "test"}]}
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {"ok": True}
+    broadcast.assert_not_called()
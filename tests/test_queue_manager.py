@@ -33,6 +33,31 @@ class TestQueueManagerBasics:
         assert queue_manager.get_queue_length(ip) == 3
         assert id1 != id2 != id3
 
+    async def test_add_responses_bulk(self, queue_manager):
+        """测试批量添加响应"""
+        ip = "192.168.1.100"
+
+        await queue_manager.add_response(ip, {"order": 0}, 200)
+        ids = await queue_manager.add_responses_bulk(
+            ip, [{"order": 1}, {"order": 2}], 201
+        )
+
+        assert len(ids) == 2
+        assert len(set(ids)) == 2
+        assert queue_manager.get_queue_length(ip) == 3
+
+        queue = await queue_manager.get_queue(ip)
+        assert [item["response"]["order"] for item in queue] == [0, 1, 2]
+        assert [item["id"] for item in queue[1:]] == ids
+        assert queue[1]["status_code"] == 201
+
+    async def test_add_responses_bulk_empty(self, queue_manager):
+        """测试批量添加空列表"""
+        ids = await queue_manager.add_responses_bulk("192.168.1.100", [])
+
+        assert ids == []
+        assert queue_manager.get_queue_length("192.168.1.100") == 0
+
     async def test_check_and_pop_success(self, queue_manager):
         """测试成功弹出响应"""
         ip = "192.168.1.100"
@@ -166,6 +191,59 @@ class TestQueueManagerDeletion:
         assert queue[0]["id"] == id1
         assert queue[1]["id"] == id3
 
+    async def test_snapshot_lengths(self, queue_manager):
+        """测试获取所有队列长度快照"""
+        await queue_manager.add_response("192.168.1.100", {"test": "1"}, 200)
+        await queue_manager.add_response("192.168.1.100", {"test": "2"}, 200)
+        await queue_manager.add_response("192.168.1.101", {"test": "3"}, 200)
+        await queue_manager.check_and_pop("192.168.1.101")
+
+        lengths = queue_manager.snapshot_lengths()
+        assert lengths == {"192.168.1.100": 2, "192.168.1.101": 0}
+
+        # 快照与内部状态独立
+        lengths["192.168.1.100"] = 99
+        assert queue_manager.get_queue_length("192.168.1.100") == 2
+
+    async def test_reads_do_not_wait_for_lock(self, queue_manager):
+        """测试读取操作不等待写锁"""
+        ip = "192.168.1.100"
+        await queue_manager.add_response(ip, {"test": "1"}, 200)
+
+        async with queue_manager._lock:
+            queue = await asyncio.wait_for(queue_manager.get_queue(ip), timeout=1)
+            all_queues = await asyncio.wait_for(
+                queue_manager.get_all_queues(), timeout=1
+            )
+
+        assert len(queue) == 1
+        assert len(all_queues[ip]) == 1
+
+    async def test_per_ip_locks_are_independent(self, queue_manager):
+        """测试不同IP的操作互不阻塞"""
+        async with queue_manager._ip_lock("192.168.1.100"):
+            await asyncio.wait_for(
+                queue_manager.add_response("192.168.1.101", {"test": "1"}, 200),
+                timeout=1
+            )
+
+        assert queue_manager.get_queue_length("192.168.1.101") == 1
+        assert queue_manager._ip_lock("192.168.1.100") is queue_manager._ip_lock("192.168.1.100")
+
+    async def test_delete_response_in_place(self, queue_manager):
+        """测试删除响应时原地修改队列（不重建 deque）"""
+        ip = "192.168.1.100"
+
+        id1 = await queue_manager.add_response(ip, {"test": "1"}, 200)
+        await queue_manager.add_response(ip, {"test": "2"}, 200)
+        original_queue = queue_manager._queues[ip]
+
+        assert await queue_manager.delete_response(ip, "fake-id") is False
+        assert await queue_manager.delete_response(ip, id1) is True
+
+        assert queue_manager._queues[ip] is original_queue
+        assert queue_manager.get_queue_length(ip) == 1
+
     async def test_delete_nonexistent_response(self, queue_manager):
         """测试删除不存在的响应"""
         success = await queue_manager.delete_response("192.168.1.100", "fake-id")
@@ -349,3 +427,44 @@ class TestQueueManagerPersistence:
         await manager2.load()
 
         assert manager2.get_queue_length("192.168.1.100") == 0
+
+    async def test_persist_coalesces_burst_writes(self, temp_file, monkeypatch):
+        """测试短时间内的多次变更合并为一次写入"""
+        from mock_openai_tool.backend.queue_manager import PresetQueueManager
+
+        manager = PresetQueueManager(persistence_path=temp_file)
+        writes = []
+        original_persist = manager._persist
+
+        async def counting_persist():
+            writes.append(manager.get_queue_length("192.168.1.100"))
+            await original_persist()
+
+        monkeypatch.setattr(manager, "_persist", counting_persist)
+
+        for i in range(20):
+            await manager.add_response("192.168.1.100", {"test": i}, 200)
+        await asyncio.sleep(0.1)
+
+        assert writes == [20]
+        await manager.flush()
+
+    async def test_flush_writes_pending_changes(self, temp_file):
+        """测试 flush 立即写入未持久化的变更"""
+        from mock_openai_tool.backend.queue_manager import PresetQueueManager
+
+        manager = PresetQueueManager(persistence_path=temp_file)
+        await manager.add_response("192.168.1.100", {"test": "flush"}, 200)
+        await manager.flush()
+
+        manager2 = PresetQueueManager(persistence_path=temp_file)
+        await manager2.load()
+        assert manager2.get_queue_length("192.168.1.100") == 1
+
+        # flush 后仍可继续持久化
+        await manager.add_response("192.168.1.100", {"test": "again"}, 200)
+        await manager.flush()
+
+        manager3 = PresetQueueManager(persistence_path=temp_file)
+        await manager3.load()
+        assert manager3.get_queue_length("192.168.1.100") == 2
@@ -81,6 +81,17 @@ class TestValidateJSON:
         assert isinstance(parsed, list)
         assert len(parsed) == 2
 
+    def test_repeated_json_uses_cache(self):
+        """测试相同字符串重复验证命中缓存"""
+        from mock_openai_tool.backend.preset_validator import PresetValidator
+
+        json_str = '{"cached": "value", "n": 1}'
+        _, parsed1, _ = PresetValidator.validate_json(json_str)
+        _, parsed2, _ = PresetValidator.validate_json(json_str)
+
+        assert parsed1 == {"cached": "value", "n": 1}
+        assert parsed2 is parsed1
+
 
 class TestValidateResponseObject:
     """测试响应对象验证"""
@@ -171,6 +182,41 @@ class TestValidateImportArray:
         assert error is not None
 
 
+class TestValidateImportBytes:
+    """测试字节形式的导入数组验证"""
+
+    def test_valid_array(self):
+        """测试有效的数组"""
+        from mock_openai_tool.backend.preset_validator import PresetValidator
+
+        data = '[{"a": 1}, {"中文": "值"}]'.encode('utf-8')
+        is_valid, parsed, error = PresetValidator.validate_import_bytes(data)
+
+        assert is_valid is True
+        assert parsed == [{"a": 1}, {"中文": "值"}]
+        assert error is None
+
+    def test_invalid_not_array(self):
+        """测试非数组类型"""
+        from mock_openai_tool.backend.preset_validator import PresetValidator
+
+        is_valid, parsed, error = PresetValidator.validate_import_bytes(b'{"key": "value"}')
+
+        assert is_valid is False
+        assert parsed is None
+        assert "必须是JSON数组" in error
+
+    def test_invalid_json_syntax(self):
+        """测试无效JSON语法"""
+        from mock_openai_tool.backend.preset_validator import PresetValidator
+
+        is_valid, parsed, error = PresetValidator.validate_import_bytes(b'[{invalid]')
+
+        assert is_valid is False
+        assert parsed is None
+        assert "JSON格式错误" in error
+
+
 class TestValidateArrayElements:
     """测试数组元素验证"""
 
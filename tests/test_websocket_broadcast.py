@@ -0,0 +1,183 @@
+"""
+测试 WebSocket 广播（每客户端发送队列、慢客户端驱逐、连接数上限）
+"""
+import pytest
+import asyncio
+import json
+
+import mock_openai_tool.backend.main as main_module
+
+
+class FakeWebSocket:
+    """记录发送内容的 WebSocket 替身"""
+
+    def __init__(self):
+        self.sent = []
+        self.closed_code = None
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+    async def close(self, code=1000):
+        self.closed_code = code
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    """提供空的客户端注册表"""
+    registry = {}
+    monkeypatch.setattr(main_module, "websocket_clients", registry, raising=False)
+    return registry
+
+
+async def _register(clients, ws, use_msgpack=False):
+    channel = main_module._ClientChannel(use_msgpack=use_msgpack)
+    channel.writer = asyncio.create_task(main_module._websocket_writer(ws, channel))
+    clients[ws] = channel
+    return channel
+
+
+@pytest.mark.asyncio
+class TestWebSocketBroadcast:
+    """测试广播行为"""
+
+    async def test_broadcast_delivers_to_all_clients(self, clients):
+        """测试广播消息通过发送任务送达所有客户端"""
+        ws1, ws2 = FakeWebSocket(), FakeWebSocket()
+        await _register(clients, ws1)
+        await _register(clients, ws2)
+
+        await main_module.broadcast_websocket({"type": "queue_updated", "ip": "1.2.3.4"})
+        await asyncio.sleep(0)
+
+        for ws in (ws1, ws2):
+            assert [json.loads(m) for m in ws.sent] == [
+                {"type": "queue_updated", "ip": "1.2.3.4"}
+            ]
+
+        for channel in clients.values():
+            channel.writer.cancel()
+
+    async def test_msgpack_clients_receive_binary_frames(self, clients):
+        """测试选择 msgpack 的客户端收到二进制帧，其他客户端仍为 JSON 文本"""
+        import msgpack
+
+        json_ws, msgpack_ws = FakeWebSocket(), FakeWebSocket()
+        await _register(clients, json_ws)
+        await _register(clients, msgpack_ws, use_msgpack=True)
+
+        message = {"type": "new_request", "data": {"id": "1", "body": {"a": 1}}}
+        await main_module.broadcast_websocket(message)
+        await asyncio.sleep(0)
+
+        assert json.loads(json_ws.sent[0]) == message
+        assert isinstance(msgpack_ws.sent[0], bytes)
+        assert msgpack.unpackb(msgpack_ws.sent[0]) == message
+
+        for channel in clients.values():
+            channel.writer.cancel()
+
+    async def test_slow_client_evicted_after_strikes(self, clients):
+        """测试发送队列持续满的客户端被驱逐并关闭"""
+        ws = FakeWebSocket()
+        channel = main_module._ClientChannel()
+        channel.writer = asyncio.create_task(asyncio.sleep(3600))
+        clients[ws] = channel
+        for _ in range(main_module.WS_SEND_QUEUE_SIZE):
+            channel.queue.put_nowait("backlog")
+
+        for _ in range(main_module.WS_MAX_STRIKES):
+            await main_module.broadcast_websocket({"type": "queue_updated"})
+        assert ws in clients
+
+        await main_module.broadcast_websocket({"type": "queue_updated"})
+        assert ws not in clients
+        assert channel.evicted is True
+
+        await asyncio.sleep(0)
+        assert channel.writer.cancelled()
+
+    async def test_strikes_reset_after_successful_enqueue(self, clients):
+        """测试入队成功后重置计数"""
+        ws = FakeWebSocket()
+        channel = main_module._ClientChannel()
+        channel.writer = asyncio.create_task(asyncio.sleep(3600))
+        channel.strikes = main_module.WS_MAX_STRIKES
+        clients[ws] = channel
+
+        await main_module.broadcast_websocket({"type": "queue_updated"})
+
+        assert channel.strikes == 0
+        assert ws in clients
+        channel.writer.cancel()
+
+    async def test_evicted_writer_closes_connection(self, clients):
+        """测试被驱逐客户端的发送任务以 1008 关闭连接"""
+        ws = FakeWebSocket()
+        channel = await _register(clients, ws)
+        await asyncio.sleep(0)
+
+        main_module._evict_client(ws)
+        await channel.writer
+
+        assert ws.closed_code == 1008
+
+    async def test_queue_updates_coalesced(self, clients, monkeypatch):
+        """测试合并窗口内的队列更新只广播一次"""
+        from unittest.mock import Mock
+
+        monkeypatch.setattr(main_module, "pending_queue_updates", {}, raising=False)
+        monkeypatch.setattr(
+            main_module, "queue_manager",
+            Mock(snapshot_lengths=Mock(return_value={"1.2.3.4": 7}))
+        )
+        ws = FakeWebSocket()
+        await _register(clients, ws)
+
+        for _ in range(10):
+            await main_module.broadcast_queue_update("queue_updated", "1.2.3.4")
+        await main_module.broadcast_queue_update("queue_updated", "5.6.7.8")
+        await asyncio.sleep(main_module.QUEUE_UPDATE_COALESCE_DELAY * 2)
+
+        messages = [json.loads(m) for m in ws.sent]
+        assert [m["ip"] for m in messages] == ["1.2.3.4", "5.6.7.8"]
+        assert messages[0]["lengths"] == {"1.2.3.4": 7}
+        assert main_module.pending_queue_updates == {}
+
+        for channel in clients.values():
+            channel.writer.cancel()
+
+
+def test_websocket_rejected_over_limit(tmp_path, monkeypatch):
+    """测试超过连接数上限时拒绝新连接"""
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main_module, "MAX_WS_CLIENTS", 0)
+
+    with TestClient(main_module.app) as client:
+        with client.websocket_connect("/ws") as ws:
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                ws.receive_text()
+        assert exc_info.value.code == 1013
+
+
+def test_websocket_msgpack_handshake(tmp_path, monkeypatch):
+    """测试通过 ?proto=msgpack 选择二进制帧"""
+    import msgpack
+    from fastapi.testclient import TestClient
+
+    monkeypatch.chdir(tmp_path)
+
+    with TestClient(main_module.app) as client:
+        with client.websocket_connect("/ws?proto=msgpack") as ws:
+            client.post("/api/preset-queue/10.0.0.1", json={"response": {"a": 1}})
+            message = msgpack.unpackb(ws.receive_bytes())
+
+    assert message["type"] == "queue_updated"
+    assert message["ip"] == "10.0.0.1"
+    assert message["lengths"] == {"10.0.0.1": 1}